@@ -1,5 +1,6 @@
 import os
 import logging  # Added so we can surface interaction/voice issues in the console.
+import random
 import discord
 from discord.abc import Connectable  # Gives us a protocol for any connectable voice target (stage/voice channel).
 from discord.ext import commands
@@ -7,19 +8,94 @@ from discord import app_commands
 from dotenv import load_dotenv
 import yt_dlp
 import asyncio
-from collections import deque
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from functools import partial
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
 
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
 
 GUILD_ID = 820497690609713153
+TEST_GUILD = discord.Object(id=GUILD_ID)
 
-SONG_QUEUES = {}  # Per-guild FIFO queues so music continues even when multiple requests overlap.
-PLAY_LOCKS = {}  # Per-guild asyncio locks to serialize queue/voice mutations and avoid race conditions.
+MAX_QUEUE = 100  # Caps each guild's queue so runaway enqueues can't pile up memory and stale stream URLs.
+
+# Per-guild state is keyed by the raw int guild_id; no str() round-trips on the hot path.
+SONG_QUEUES = defaultdict(partial(asyncio.Queue, maxsize=MAX_QUEUE))  # Per-guild FIFO queues so music continues even when multiple requests overlap.
+PLAYER_TASKS = {}  # One long-running consumer per guild; /play only enqueues, so no lock is needed around the queue.
+CONNECT_LOCKS = defaultdict(asyncio.Lock)  # Serializes voice connects only, so one handshake can't tear down another.
 VOICE_CHANNELS = {}  # Tracks the channel each guild last requested so reconnects know where to go.
 LOGGER = logging.getLogger("discord_bot")  # Shared logger for interaction/voice diagnostics.
 
 
+@dataclass
+class QueuedTrack:
+    """A queued song; `source` is filled in ahead of time so the next track starts without an FFmpeg spawn gap."""
+
+    audio_url: str
+    title: str
+    source: Optional[discord.FFmpegOpusAudio] = None
+
+
+VOICE_CONNECT_ATTEMPTS = 5
+TRANSIENT_VOICE_CLOSE_CODES = {4006, 4015}  # Session invalidated / voice server crashed; a fresh handshake usually works.
+
+SEARCH_CACHE = OrderedDict()  # LRU of normalized query -> (audio_url, title, expires_at) so repeat searches skip yt-dlp.
+SEARCH_CACHE_MAXSIZE = 512
+SEARCH_CACHE_TTL = 900  # Seconds; kept well under YouTube's stream URL lifetime.
+YTDLP_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "yt-dlp")
+
+FFMPEG_EXE = "bin\\ffmpeg\\ffmpeg.exe"
+FFMPEG_OPTS = {
+    "before_options": "-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5",
+    "options": "-vn -c:a libopus -b:a 96k",
+}
+
+YDL_OPTIONS = {
+    "format": "bestaudio[abr<=96]/bestaudio",
+    "noplaylist": True,
+    "playlist_items": "1",  # A pasted playlist/channel URL only resolves formats for the track /play will use.
+    "quiet": True,
+    "no_warnings": True,
+    "cachedir": YTDLP_CACHE_DIR,  # Persists player/decipher data between runs.
+    "skip_download": True,
+    "socket_timeout": 5,
+    "writeinfojson": False,
+    "extractor_args": {
+        "youtube": {
+            # yt-dlp ignores the old youtube_include_*_manifest keys. HLS stays enabled because some
+            # clients only offer HLS audio, and skipping it can leave bestaudio with nothing to pick.
+            "skip": ["dash"],
+        },
+    },
+}
+
+# Per-process YoutubeDL, built once by _init_ydl so extractors/cookies aren't reinitialized per /play.
+# With `requests` installed yt-dlp uses its pooled session handler, so keep-alive connections to
+# youtube.com/googlevideo.com survive between searches on the same worker instead of re-handshaking TLS.
+_WORKER_YDL = None
+
+
+def _init_ydl():
+    global _WORKER_YDL
+    _WORKER_YDL = yt_dlp.YoutubeDL(YDL_OPTIONS)
+
+
+def _new_ytdlp_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=YTDLP_WORKERS, initializer=_init_ydl)
+
+
+# Separate processes so concurrent searches don't serialize on yt-dlp's parsing behind the GIL.
+# Dedicated to yt-dlp and sized independently, so extractions never compete with to_thread()/default-executor work.
+YTDLP_WORKERS = 4
+YTDLP_POOL = _new_ytdlp_pool()
+
+
 async def send_interaction_message(
     interaction: discord.Interaction,
     *,
@@ -65,17 +141,109 @@ async def defer_interaction(interaction: discord.Interaction) -> bool:
         LOGGER.error("Failed to defer interaction (code=%s): %s", getattr(exc, "code", "n/a"), exc)
         return False
 
-async def search_ytdlp_async(query, ydl_opts):
+async def search_ytdlp_async(query):
+    """Resolve a query to (audio_url, title) in the yt-dlp pool, or None when nothing matched."""
+    global YTDLP_POOL
     loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, lambda: _extract(query, ydl_opts))
+    pool = YTDLP_POOL
+    try:
+        return await loop.run_in_executor(pool, _extract_worker, query)
+    except BrokenProcessPool:
+        # A dead worker (or a failing _init_ydl) breaks the pool for good; swap in a fresh one and retry once.
+        if YTDLP_POOL is pool:
+            LOGGER.warning("yt-dlp worker pool broke; rebuilding it.")
+            pool.shutdown(wait=False, cancel_futures=True)
+            YTDLP_POOL = _new_ytdlp_pool()
+        return await loop.run_in_executor(YTDLP_POOL, _extract_worker, query)
+
+
+async def warm_ytdlp_pool():
+    """Start every yt-dlp worker up front so the first /play doesn't pay for process spawn and _init_ydl."""
+    loop = asyncio.get_running_loop()
+    # Submitted together so no worker is idle yet and the pool spawns one process per call.
+    await asyncio.gather(*(loop.run_in_executor(YTDLP_POOL, _worker_ready) for _ in range(YTDLP_WORKERS)))
+
+def _worker_ready():
+    return True
+
+def _extract_worker(query):
+    try:
+        results = _WORKER_YDL.extract_info(query, download=False)
+    except Exception as exc:
+        # DownloadError carries exc_info (a traceback) and can't be pickled back to the bot process.
+        raise RuntimeError(str(exc)) from None
+
+    # Searches/playlists come back with "entries" (nested per tab for channel URLs); a direct video link is the
+    # track itself. Walk down to the first real entry.
+    first_track = results
+    while first_track is not None and "entries" in first_track:
+        first_track = next((entry for entry in first_track["entries"] or () if entry), None)
+    if first_track is None or "url" not in first_track:
+        return None
+    # Only the fields /play needs cross the process boundary, not the whole info dict.
+    return first_track["url"], first_track.get("title", "Untitled")
+
+
+def _stream_expiry(audio_url: str) -> float:
+    """Return when a cached stream URL stops being usable, honoring the `expire=` param googlevideo URLs carry."""
+    expires_at = time.time() + SEARCH_CACHE_TTL
+    try:
+        expire_param = parse_qs(urlparse(audio_url).query).get("expire")
+        if expire_param:
+            expires_at = min(expires_at, float(expire_param[0]))
+    except ValueError:
+        pass
+    return expires_at
 
-def _extract(query, ydl_opts):
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        return ydl.extract_info(query, download=False)
+
+def _is_url(song_query: str) -> bool:
+    return song_query.startswith(("http://", "https://"))
+
+
+def _cache_key(song_query: str) -> str:
+    """Normalize a query for the search cache; URLs keep their case since YouTube video IDs are case-sensitive."""
+    key = song_query.strip()
+    return key if _is_url(key) else key.lower()
+
+
+def get_cached_track(song_query: str):
+    """Return the cached (audio_url, title) for a query, or None if missing or expired."""
+    key = _cache_key(song_query)
+    entry = SEARCH_CACHE.get(key)
+    if entry is None:
+        return None
+    audio_url, title, expires_at = entry
+    if expires_at <= time.time():
+        # Stream URL has (or is about to) expire; force a fresh extraction.
+        del SEARCH_CACHE[key]
+        return None
+    SEARCH_CACHE.move_to_end(key)
+    return audio_url, title
+
+
+def cache_track(song_query: str, audio_url: str, title: str):
+    """Remember a resolved track, evicting the least recently used entry once the cache is full."""
+    key = _cache_key(song_query)
+    SEARCH_CACHE[key] = (audio_url, title, _stream_expiry(audio_url))
+    SEARCH_CACHE.move_to_end(key)
+    while len(SEARCH_CACHE) > SEARCH_CACHE_MAXSIZE:
+        SEARCH_CACHE.popitem(last=False)
+
+
+def _voice_backoff(attempt: int) -> float:
+    """Exponential backoff with jitter so guilds recovering from the same voice outage don't retry in lockstep."""
+    return min(8.0, 0.5 * (2 ** attempt)) + random.random() * 0.5
 
 
 async def ensure_voice_client(guild: discord.Guild, target_channel: Connectable) -> discord.VoiceClient:
     """Connect or move the bot to the desired voice channel, retrying on transient voice gateway errors."""
+    # discord.py registers guild.voice_client before the handshake finishes, so a concurrent caller would see a
+    # "disconnected" client and force-reconnect it mid-handshake. Only the connect is locked, never the queue.
+    async with CONNECT_LOCKS[guild.id]:
+        return await _connect_voice_client(guild, target_channel)
+
+
+async def _connect_voice_client(guild: discord.Guild, target_channel: Connectable) -> discord.VoiceClient:
     # Guarantees the bot is in the right channel before dequeueing audio, even after Discord drops the connection.
     if target_channel is None:
         raise RuntimeError("No target voice channel recorded for this guild.")
@@ -86,19 +254,16 @@ async def ensure_voice_client(guild: discord.Guild, target_channel: Connectable)
             return voice_client
 
         # Allow discord.py's internal reconnection logic a brief window to finish before forcing a reconnect.
-        try:
-            reconnect_wait = await asyncio.wait_for(
-                asyncio.to_thread(voice_client.wait_until_connected, 5.0),
-                timeout=6.0,
-            )
-        except Exception:
-            reconnect_wait = False
-
-        if reconnect_wait:
-            return voice_client
+        # Polled on the event loop rather than blocking a worker thread in wait_until_connected().
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + 2.0
+        while loop.time() < deadline:
+            if voice_client.is_connected():
+                return voice_client
+            await asyncio.sleep(0.05)
 
     last_exception = None
-    for attempt in range(3):
+    for attempt in range(VOICE_CONNECT_ATTEMPTS):
         # Retry a few times because Discord occasionally closes the voice gateway with code 4006 mid-handshake.
         try:
             voice_client = guild.voice_client
@@ -113,16 +278,22 @@ async def ensure_voice_client(guild: discord.Guild, target_channel: Connectable)
         except discord.errors.ConnectionClosed as exc:
             last_exception = exc
             LOGGER.warning(
-                "Voice gateway closed with code %s while connecting to %s (attempt %s/3).",
+                "Voice gateway closed with code %s while connecting to %s (attempt %s/%s).",
                 exc.code,
                 target_channel.id,
                 attempt + 1,
+                VOICE_CONNECT_ATTEMPTS,
             )
-            await asyncio.sleep(1)
+            if exc.code not in TRANSIENT_VOICE_CLOSE_CODES:
+                # Codes like 4014 (kicked) or 4004 (auth failed) won't recover by retrying.
+                break
         except discord.DiscordException as exc:
             last_exception = exc
             LOGGER.error("Voice connect/move failed on attempt %s: %s", attempt + 1, exc)
-            await asyncio.sleep(1)
+
+        if attempt < VOICE_CONNECT_ATTEMPTS - 1:
+            # No point sleeping after the final attempt; the caller is waiting on the error.
+            await asyncio.sleep(_voice_backoff(attempt))
 
     if last_exception:
         raise last_exception
@@ -131,12 +302,26 @@ async def ensure_voice_client(guild: discord.Guild, target_channel: Connectable)
 intents = discord.Intents.default()
 intents.message_content = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+class MusicBot(commands.Bot):
+    async def setup_hook(self):
+        # Runs once at startup, unlike on_ready which fires again after every gateway reconnect.
+        await self.tree.sync(guild=TEST_GUILD)
+        try:
+            await warm_ytdlp_pool()
+        except Exception as exc:
+            # Not fatal: search_ytdlp_async rebuilds a broken pool on first use.
+            LOGGER.warning("Could not warm the yt-dlp worker pool: %s", exc)
+
+    async def close(self):
+        await super().close()
+        # Don't leave yt-dlp worker processes behind once the bot shuts down.
+        YTDLP_POOL.shutdown(wait=False, cancel_futures=True)
+
+
+bot = MusicBot(command_prefix="!", intents=intents)
 
 @bot.event
 async def on_ready():
-    test_guild = discord.Object(id=GUILD_ID)
-    await bot.tree.sync(guild=test_guild)
     print(f"{bot.user} is online")
 
 # @bot.event 
@@ -147,67 +332,64 @@ async def on_ready():
 @app_commands.describe(song_query="Search query")
 async def play(interaction: discord.Interaction, song_query: str):
     try:
-        interaction_deferred = False  # Tracks whether we already sent a defer so later replies use followups.
         voice_state = interaction.user.voice  # Capture the caller's voice channel for validation/reconnects.
         if voice_state is None or voice_state.channel is None:
+            # Answered before deferring so the reply stays ephemeral; there's no await above, so no expiry risk.
             await send_interaction_message(interaction, content="You must be in a voice channel.", ephemeral=True)
             return
 
+        # Deferred ahead of every other await so the 3-second acknowledgement window can't lapse under us.
         interaction_deferred = await defer_interaction(interaction)
         if not interaction_deferred:
             # Interaction is no longer valid; nothing we can do.
             return
 
-        ydl_options = {
-            "format": "bestaudio[abr<=96]/bestaudio",
-            "noplaylist": True,
-            "youtube_include_dash_manifest": False,
-            "youtube_include_hls_manifest": False,
-        }
-
-        query = "ytsearch1: " + song_query
-        results = await search_ytdlp_async(query, ydl_options)
-        tracks = results.get("entries", [])
-
-        if not tracks:
+        cached_track = get_cached_track(song_query)
+        if cached_track:
+            audio_url, title = cached_track
+        else:
+            # Pasted links go straight to their own extractor instead of through a YouTube search.
+            query = song_query if _is_url(song_query) else f"ytsearch1:{song_query}"
+            found_track = await search_ytdlp_async(query)
+
+            if found_track is None:
+                await send_interaction_message(
+                    interaction,
+                    content="No results found.",
+                    ephemeral=True,
+                    force_followup=interaction_deferred,
+                )
+                return
+
+            audio_url, title = found_track
+            cache_track(song_query, audio_url, title)
+
+        guild_id = interaction.guild_id
+        await ensure_voice_client(interaction.guild, voice_state.channel)
+
+        # Recorded only once connected, so a player finishing during the connect can't release it from under us.
+        VOICE_CHANNELS[guild_id] = voice_state.channel  # Remember the caller's channel for future reconnect attempts.
+        try:
+            # Looked up only after connecting, since the player may release the guild's queue meanwhile.
+            SONG_QUEUES[guild_id].put_nowait(QueuedTrack(audio_url, title))
+        except asyncio.QueueFull:
             await send_interaction_message(
                 interaction,
-                content="No results found.",
+                content="Queue full",
                 ephemeral=True,
                 force_followup=interaction_deferred,
             )
             return
 
-        first_track = tracks[0]
-        audio_url = first_track["url"]
-        title = first_track.get("title", "Untitled")
-
-        guild_id = str(interaction.guild_id)
-        lock = PLAY_LOCKS.setdefault(guild_id, asyncio.Lock())
-        start_playback = False  # Indicates whether this request should start playback or just enqueue.
-        voice_client = None
-        VOICE_CHANNELS[guild_id] = voice_state.channel  # Remember the caller's channel for future reconnect attempts.
-        async with lock:
-            voice_client = await ensure_voice_client(interaction.guild, voice_state.channel)
-
-            queue = SONG_QUEUES.setdefault(guild_id, deque())
-            queue.append((audio_url, title))
-            if not (voice_client.is_playing() or voice_client.is_paused()):
-                start_playback = True
-
+        start_playback = guild_id not in PLAYER_TASKS  # No consumer yet means this request starts playback.
         if start_playback:
-            await send_interaction_message(
-                interaction,
-                content=f"Now playing: **{title}**",
-                force_followup=interaction_deferred,
-            )
-            await play_next_song(voice_client, guild_id, interaction.channel)
-        else:
-            await send_interaction_message(
-                interaction,
-                content=f"Added to queue: **{title}**",
-                force_followup=interaction_deferred,
-            )
+            PLAYER_TASKS[guild_id] = asyncio.create_task(_player_loop(interaction.guild, interaction.channel))
+
+        await send_interaction_message(
+            interaction,
+            content=f"Now playing: **{title}**" if start_playback else f"Added to queue: **{title}**",
+            force_followup=interaction_deferred,
+        )
     except Exception as e:
         await send_interaction_message(
             interaction,
@@ -248,55 +430,132 @@ async def skip(interaction: discord.Interaction):
 async def stop(interaction: discord.Interaction):
     voice_client = interaction.guild.voice_client
     if voice_client:
-        voice_client.disconnect()
-        SONG_QUEUES[str(interaction.guild_id)] = deque()
+        # Tear down the player and queue first so nothing reconnects to play leftovers.
+        player_task = PLAYER_TASKS.pop(interaction.guild_id, None)
+        if player_task is not None:
+            player_task.cancel()
+        _release_guild(interaction.guild_id)
+        await voice_client.disconnect(force=True)
         await interaction.response.send_message("Stopping...")
     else:
         await interaction.response.send_message("There's nothing to stop")
 
-async def play_next_song(voice_client, guild_id, channel):
-    lock = PLAY_LOCKS.setdefault(guild_id, asyncio.Lock())
-    async with lock:
-        queue = SONG_QUEUES.setdefault(guild_id, deque())
-        target_voice_channel = VOICE_CHANNELS.get(guild_id)
-        guild = getattr(channel, "guild", None) or bot.get_guild(int(guild_id))
-        if guild is None:
-            LOGGER.warning("Cannot resolve guild from channel; aborting playback.")
-            return
-        if target_voice_channel is None:
-            LOGGER.warning("No voice channel recorded for guild %s; aborting playback.", guild_id)
-            return
+async def _player_loop(guild: discord.Guild, channel):
+    """Per-guild consumer: plays queued tracks back to back until the queue runs dry."""
+    guild_id = guild.id
+    queue = SONG_QUEUES[guild_id]
+    loop = asyncio.get_running_loop()
+    voice_client = guild.voice_client
+    track = await queue.get()  # /play starts us right after enqueueing, so this returns immediately.
+    next_get = None
+    finished_wait = None
+    try:
+        while True:
+            if track is None:
+                # Queue ran dry. Leave voice while still owning the guild, so a /play landing during the
+                # disconnect is picked up here rather than by a new player this disconnect would cut off.
+                if voice_client is not None and voice_client.is_connected():
+                    await voice_client.disconnect()
+                if queue.empty():
+                    break
+                track = queue.get_nowait()
+                continue
+
+            target_voice_channel = VOICE_CHANNELS.get(guild_id)
+            if target_voice_channel is None:
+                LOGGER.warning("No voice channel recorded for guild %s; aborting playback.", guild_id)
+                return
+
+            # /play just ensured the connection, so only re-check when the current client can't be reused as-is.
+            if voice_client is None or not voice_client.is_connected() or voice_client.channel != target_voice_channel:
+                try:
+                    voice_client = await ensure_voice_client(guild, target_voice_channel)
+                except Exception as exc:
+                    LOGGER.error("Unable to ensure voice client for guild %s: %s", guild_id, exc)
+                    asyncio.create_task(channel.send("Could not connect to voice; stopping playback."))
+                    return
+
+            title = track.title
+            finished = asyncio.Event()
+
+            def after_play(error, title=title, finished=finished):
+                if error:
+                    LOGGER.error("Error playing %s: %s", title, error)
+                loop.call_soon_threadsafe(finished.set)
 
-        try:
-            voice_client = await ensure_voice_client(guild, target_voice_channel)
-        except Exception as exc:
-            LOGGER.error("Unable to ensure voice client for guild %s: %s", guild_id, exc)
-            return
+            source = track.source
+            try:
+                source = source or _build_source(track.audio_url)
+                voice_client.play(source, after=after_play)
+            except Exception as exc:
+                # e.g. FFmpeg missing/failed to spawn or "Not connected to voice"; skip rather than kill the player.
+                LOGGER.error("Could not start %s in guild %s: %s", title, guild_id, exc)
+                if source is not None:
+                    source.cleanup()
+                asyncio.create_task(channel.send(f"Could not play **{title}**, skipping it."))
+                track = None if queue.empty() else queue.get_nowait()
+                continue
+            track = None
+            asyncio.create_task(channel.send(f"Now playing: **{title}**"))
 
-        if voice_client.is_playing() or voice_client.is_paused():
-            return
+            # Pick up the next request while this one plays so its FFmpeg source is warm when the song ends.
+            next_get = asyncio.ensure_future(queue.get())
+            finished_wait = asyncio.ensure_future(finished.wait())
+            await asyncio.wait({next_get, finished_wait}, return_when=asyncio.FIRST_COMPLETED)
+            if next_get.done():
+                track = next_get.result()
+                next_get = None
+                _preload(track)
+            await finished_wait
+            finished_wait = None
+
+            if track is None:
+                next_get.cancel()
+                next_get = None
+                if not queue.empty():
+                    track = queue.get_nowait()  # Arrived in the same tick the song ended.
+    finally:
+        for pending in (next_get, finished_wait):
+            if pending is not None:
+                pending.cancel()
+        if track is not None and track.source is not None:
+            track.source.cleanup()
+        if PLAYER_TASKS.get(guild_id) is asyncio.current_task():
+            try:
+                # Already disconnected when the queue ran dry; this only awaits when bailing out on an error.
+                if voice_client is not None and voice_client.is_connected():
+                    await voice_client.disconnect()
+            finally:
+                # On the normal path this runs with no await after the final queue.empty() check,
+                # so no /play can slip in between.
+                PLAYER_TASKS.pop(guild_id, None)
+                _release_guild(guild_id)
 
-        if queue:
-            audio_url, title = queue.popleft()
 
-            ffmpeg_options = {
-                "before_options": "-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5",
-                "options": "-vn -c:a libopus -b:a 96k",
-            }
+def _build_source(audio_url: str) -> discord.FFmpegOpusAudio:
+    # Constructed directly rather than via from_probe(), so no ffprobe subprocess runs per track.
+    return discord.FFmpegOpusAudio(audio_url, **FFMPEG_OPTS, executable=FFMPEG_EXE)
 
-            source = discord.FFmpegOpusAudio(audio_url, **ffmpeg_options, executable="bin\\ffmpeg\\ffmpeg.exe")
 
-            def after_play(error):
-                if error:
-                    print(f"Error playing {title}: {error}")
-                asyncio.run_coroutine_threadsafe(play_next_song(voice_client, guild_id, channel), bot.loop)
+def _preload(track: QueuedTrack):
+    """Spawn FFmpeg for the next track while the current song is still playing."""
+    try:
+        track.source = _build_source(track.audio_url)
+    except Exception as exc:
+        # _player_loop will retry the spawn when the track comes up.
+        LOGGER.warning("Could not preload %s: %s", track.title, exc)
+
+
+def _release_guild(guild_id: int):
+    """Drop a guild's queue and channel, killing any FFmpeg processes that were preloaded for it."""
+    queue = SONG_QUEUES.pop(guild_id, None)
+    while queue is not None and not queue.empty():
+        track = queue.get_nowait()
+        if track.source is not None:
+            track.source.cleanup()
+    VOICE_CHANNELS.pop(guild_id, None)  # Drop stale channel data once the queue is gone.
 
-            voice_client.play(source, after=after_play)
-            asyncio.create_task(channel.send(f"Now playing: **{title}**"))
-        else:
-            if voice_client.is_connected():
-                await voice_client.disconnect()
-            SONG_QUEUES[guild_id] = deque()
-            VOICE_CHANNELS.pop(guild_id, None)  # Drop stale channel data once the queue is empty.
 
-bot.run(TOKEN)
+if __name__ == "__main__":
+    # Guarded so yt-dlp worker processes can import this module without starting another bot.
+    bot.run(TOKEN)